@@ -1,15 +1,31 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, Response
 from flask_cors import CORS
-from medical_extraction_system import app as medical_app, model
+from medical_extraction_system import (
+    app as medical_app,
+    model,
+    checkpointer,
+    extract_medical_information,
+    extract_medical_information_batch,
+    generate_diagnosis,
+    MedicalExtraction,
+    OPENAI_MAX_RETRIES,
+    build_openai_http_client
+)
+from pydantic import ValidationError
+from session_store import create_session_store
 import uuid
 import logging
 from datetime import datetime, timezone
-import traceback
+from itertools import islice
 import os
-import tempfile
+import io
+import http.cookiejar
+from werkzeug.exceptions import HTTPException
 from werkzeug.utils import secure_filename
 import openai
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 from urllib.parse import urlparse
 
 # Configure logging
@@ -20,17 +36,129 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Store active sessions
-active_sessions = {}
+# Store active sessions (Redis when REDIS_URL is set, otherwise in memory)
+session_store = create_session_store()
+
+# Shared HTTP session for audio downloads so keep-alive connections are
+# reused across requests instead of opening a new TCP/TLS connection each time.
+# The pool is sized to the server thread count so concurrent downloads don't
+# discard connections, and cookies are never stored since the session is
+# shared between users.
+HTTP_POOL_MAXSIZE = int(os.getenv("GUNICORN_THREADS", "256"))
+http_session = requests.Session()
+http_session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+http_adapter = HTTPAdapter(pool_maxsize=HTTP_POOL_MAXSIZE)
+http_session.mount('http://', http_adapter)
+http_session.mount('https://', http_adapter)
+
+# Shared OpenAI client for Whisper calls so its connection pool (and TLS
+# sessions to api.openai.com) are reused across transcription requests
+OPENAI_CLIENT = openai.OpenAI(
+    timeout=120.0,
+    max_retries=OPENAI_MAX_RETRIES,
+    http_client=build_openai_http_client()
+)
+
+# Audio formats accepted for upload and URL transcription
+ALLOWED_AUDIO_EXTENSIONS = frozenset({'mp3', 'wav', 'm4a', 'ogg', 'flac'})
+ALLOWED_URL_AUDIO_EXTENSIONS = frozenset({'mp3', 'wav', 'm4a', 'ogg', 'flac', 'aac'})
+
+# Whisper API upload limit
+MAX_AUDIO_SIZE = 25 * 1024 * 1024  # 25MB
+
+# Let Werkzeug reject oversized request bodies (including uploads) from the
+# Content-Length header or while streaming, before anything is buffered.
+# The limit covers the whole multipart body, so leave headroom for the
+# boundaries and part headers around a file right at the audio limit.
+app.config['MAX_CONTENT_LENGTH'] = MAX_AUDIO_SIZE + 64 * 1024
+
+# Limits for the batch endpoints
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "32"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+
+def _orjson_default(obj):
+    """Serialize objects orjson does not handle natively (e.g. Pydantic models)."""
+    if hasattr(obj, 'model_dump'):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _ojson(payload, status=200):
+    """Build a JSON response serialized with orjson."""
+    return Response(
+        orjson.dumps(payload, default=_orjson_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS),
+        status=status,
+        mimetype='application/json'
+    )
+
+def _parse_json():
+    """Decode the request body with orjson, returning None if it is not a JSON object."""
+    try:
+        data = orjson.loads(request.get_data(cache=False))
+    except orjson.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+def _content_length(headers):
+    """Return the Content-Length header as an int, or None if missing or malformed."""
+    value = headers.get('content-length', '')
+    return int(value) if value.isdigit() else None
+
+def _audio_too_large():
+    return _ojson({
+        "error": "Audio file too large. Maximum size is 25MB"
+    }, 413)
+
+def _internal_error(message, log_message):
+    """Log the active exception under a fresh error id and return a 500 that references it."""
+    error_id = uuid.uuid4().hex
+    logger.exception("%s (error_id=%s)", log_message, error_id)
+    return _ojson({
+        "error": message,
+        "error_id": error_id
+    }, 500)
+
+def _chat_response(session_id, result):
+    """Record session activity and build the chat response body, or None if the system gave no reply."""
+    # Extract the final response
+    if not (result and "messages" in result and result["messages"]):
+        return None
+    
+    final_message = result["messages"][-1]
+    response_content = final_message.content
+    
+    # Determine if this was handled by medical or off-topic agent. The final
+    # message is normally named, so the history is only scanned as a fallback.
+    agent_used = getattr(final_message, 'name', None) or next(
+        (msg.name for msg in islice(reversed(result["messages"]), 1, None) if getattr(msg, 'name', None)),
+        None
+    )
+    
+    # One timestamp serves both the session record and the response
+    now_iso = datetime.now(timezone.utc).isoformat()
+    
+    # Store session info
+    session_store.set(session_id, {
+        "last_activity": now_iso,
+        "message_count": len(result["messages"]),
+        "agent_used": agent_used
+    })
+    
+    return {
+        "response": response_content,
+        "session_id": session_id,
+        "agent_used": agent_used,
+        "timestamp": now_iso,
+        "message_count": len(result["messages"])
+    }
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
-    return jsonify({
+    return _ojson({
         "status": "healthy",
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "service": "Medical Information Extraction API"
-    }), 200
+    }, 200)
 
 @app.route('/api/chat', methods=['POST'])
 def chat():
@@ -46,29 +174,33 @@ def chat():
     try:
         # Validate request
         if not request.is_json:
-            return jsonify({
+            return _ojson({
                 "error": "Content-Type must be application/json"
-            }), 400
+            }, 400)
         
-        data = request.get_json()
+        data = _parse_json()
+        if data is None:
+            return _ojson({
+                "error": "Request body must be a JSON object"
+            }, 400)
         
         # Validate required fields
         if 'message' not in data:
-            return jsonify({
+            return _ojson({
                 "error": "Missing required field: message"
-            }), 400
+            }, 400)
         
         message = data['message'].strip()
         if not message:
-            return jsonify({
+            return _ojson({
                 "error": "Message cannot be empty"
-            }), 400
+            }, 400)
         
         # Get or create session ID
         session_id = data.get('session_id', str(uuid.uuid4()))
         
-        logger.info(f"Processing chat request for session: {session_id}")
-        logger.info(f"Message: {message[:100]}...")  # Log first 100 chars
+        logger.info("Processing chat request for session: %s", session_id)
+        logger.info("Message: %.100s...", message)  # Log first 100 chars
         
         # Configure the medical system
         config = {"configurable": {"thread_id": session_id}}
@@ -83,45 +215,132 @@ def chat():
             ]
         }, config=config)
         
-        # Extract the final response
-        if result and "messages" in result and result["messages"]:
-            final_message = result["messages"][-1]
-            response_content = final_message.content
+        payload = _chat_response(session_id, result)
+        if payload is not None:
+            return _ojson(payload, 200)
+        else:
+            logger.error("No response received from medical system")
+            return _ojson({
+                "error": "No response received from medical system"
+            }, 500)
             
-            # Determine if this was handled by medical or off-topic agent
-            agent_used = None
-            for msg in reversed(result["messages"]):
-                if hasattr(msg, 'name') and msg.name:
-                    agent_used = msg.name
-                    break
+    except HTTPException:
+        raise
+    except Exception:
+        return _internal_error("Internal server error", "Error processing chat request")
+
+@app.route('/api/chat/batch', methods=['POST'])
+def chat_batch():
+    """
+    Process several chat messages in one request.
+    
+    Expected JSON payload:
+    {
+        "messages": [
+            {"message": "Patient text or medical query", "session_id": "optional_session_id"}
+        ]
+    }
+    """
+    try:
+        if not request.is_json:
+            return _ojson({
+                "error": "Content-Type must be application/json"
+            }, 400)
+        
+        data = _parse_json()
+        if data is None:
+            return _ojson({
+                "error": "Request body must be a JSON object"
+            }, 400)
+        
+        items = data.get('messages')
+        if not isinstance(items, list) or not items:
+            return _ojson({
+                "error": "Field 'messages' must be a non-empty list"
+            }, 400)
+        
+        if len(items) > BATCH_MAX_SIZE:
+            return _ojson({
+                "error": f"Too many messages. Maximum batch size is {BATCH_MAX_SIZE}"
+            }, 400)
+        
+        inputs = []
+        configs = []
+        session_ids = []
+        for item in items:
+            if not isinstance(item, dict):
+                return _ojson({
+                    "error": "Each item must be a JSON object"
+                }, 400)
             
-            # Store session info
-            active_sessions[session_id] = {
-                "last_activity": datetime.now(timezone.utc).isoformat(),
-                "message_count": len(result["messages"]),
-                "agent_used": agent_used
-            }
+            message = item.get('message')
+            message = message.strip() if isinstance(message, str) else ''
+            if not message:
+                return _ojson({
+                    "error": "Each item must contain a non-empty message"
+                }, 400)
             
-            return jsonify({
-                "response": response_content,
+            if 'session_id' in item:
+                session_id = item['session_id']
+                if not isinstance(session_id, str) or not session_id:
+                    return _ojson({
+                        "error": "session_id must be a non-empty string"
+                    }, 400)
+            else:
+                session_id = str(uuid.uuid4())
+            session_ids.append(session_id)
+            inputs.append({
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": message
+                    }
+                ]
+            })
+            configs.append({
+                "configurable": {"thread_id": session_id},
+                "max_concurrency": BATCH_MAX_CONCURRENCY
+            })
+        
+        # Runs sharing a thread_id would race on the same checkpoint
+        if len(set(session_ids)) != len(session_ids):
+            return _ojson({
+                "error": "Each message in a batch must use a distinct session_id"
+            }, 400)
+        
+        logger.info("Processing chat batch of %d messages", len(inputs))
+        
+        results = medical_app.batch(inputs, config=configs, return_exceptions=True)
+        
+        responses = []
+        for session_id, result in zip(session_ids, results):
+            if isinstance(result, Exception):
+                error_id = uuid.uuid4().hex
+                logger.error(
+                    "Error processing chat message for session %s (error_id=%s)", session_id, error_id,
+                    exc_info=result
+                )
+                responses.append({
+                    "session_id": session_id,
+                    "error": "Internal server error",
+                    "error_id": error_id
+                })
+                continue
+            
+            payload = _chat_response(session_id, result)
+            responses.append(payload if payload is not None else {
                 "session_id": session_id,
-                "agent_used": agent_used,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "message_count": len(result["messages"])
-            }), 200
-        else:
-            logger.error("No response received from medical system")
-            return jsonify({
                 "error": "No response received from medical system"
-            }), 500
-            
-    except Exception as e:
-        logger.error(f"Error processing chat request: {str(e)}")
-        logger.error(traceback.format_exc())
-        return jsonify({
-            "error": "Internal server error",
-            "details": str(e)
-        }), 500
+            })
+        
+        return _ojson({
+            "responses": responses
+        }, 200)
+        
+    except HTTPException:
+        raise
+    except Exception:
+        return _internal_error("Internal server error", "Error processing chat batch request")
 
 @app.route('/api/extract', methods=['POST'])
 def extract_medical_info():
@@ -135,45 +354,97 @@ def extract_medical_info():
     """
     try:
         if not request.is_json:
-            return jsonify({
+            return _ojson({
                 "error": "Content-Type must be application/json"
-            }), 400
+            }, 400)
         
-        data = request.get_json()
+        data = _parse_json()
+        if data is None:
+            return _ojson({
+                "error": "Request body must be a JSON object"
+            }, 400)
         
         if 'text' not in data:
-            return jsonify({
+            return _ojson({
                 "error": "Missing required field: text"
-            }), 400
+            }, 400)
         
         text = data['text'].strip()
         if not text:
-            return jsonify({
+            return _ojson({
                 "error": "Text cannot be empty"
-            }), 400
-        
-        logger.info(f"Processing extraction request for text: {text[:100]}...")
+            }, 400)
         
-        # Import the extraction function
-        from backend.medical_extraction_system import extract_medical_information
+        logger.info("Processing extraction request for text: %.100s...", text)
         
         # Extract medical information
         extracted_info = extract_medical_information(text)
         
-        return jsonify({
+        return _ojson({
             "extracted_info": extracted_info,
             "timestamp": datetime.now(timezone.utc).isoformat()
-        }), 200
-        
-    except Exception as e:
-        logger.error(f"Error processing extraction request: {str(e)}")
-        return jsonify({
-            "error": "Internal server error",
-            "details": str(e)
-        }), 500
+        }, 200)
+        
+    except HTTPException:
+        raise
+    except Exception:
+        return _internal_error("Internal server error", "Error processing extraction request")
+
+@app.route('/api/extract/batch', methods=['POST'])
+def extract_medical_info_batch():
+    """
+    Extract medical information from several texts in one request.
+    
+    Expected JSON payload:
+    {
+        "texts": ["Medical text to extract information from", ...]
+    }
+    """
+    try:
+        if not request.is_json:
+            return _ojson({
+                "error": "Content-Type must be application/json"
+            }, 400)
+        
+        data = _parse_json()
+        if data is None:
+            return _ojson({
+                "error": "Request body must be a JSON object"
+            }, 400)
+        
+        texts = data.get('texts')
+        if not isinstance(texts, list) or not texts:
+            return _ojson({
+                "error": "Field 'texts' must be a non-empty list"
+            }, 400)
+        
+        if len(texts) > BATCH_MAX_SIZE:
+            return _ojson({
+                "error": f"Too many texts. Maximum batch size is {BATCH_MAX_SIZE}"
+            }, 400)
+        
+        texts = [text.strip() if isinstance(text, str) else '' for text in texts]
+        if not all(texts):
+            return _ojson({
+                "error": "Texts cannot be empty"
+            }, 400)
+        
+        logger.info("Processing extraction batch of %d texts", len(texts))
+        
+        extracted = extract_medical_information_batch(texts, max_concurrency=BATCH_MAX_CONCURRENCY)
+        
+        return _ojson({
+            "extracted_info": extracted,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }, 200)
+        
+    except HTTPException:
+        raise
+    except Exception:
+        return _internal_error("Internal server error", "Error processing extraction batch request")
 
 @app.route('/api/diagnose', methods=['POST'])
-def generate_diagnosis():
+def generate_diagnosis_endpoint():
     """
     Endpoint specifically for diagnosis generation.
     
@@ -184,59 +455,77 @@ def generate_diagnosis():
     """
     try:
         if not request.is_json:
-            return jsonify({
+            return _ojson({
                 "error": "Content-Type must be application/json"
-            }), 400
+            }, 400)
         
-        data = request.get_json()
+        data = _parse_json()
+        if data is None:
+            return _ojson({
+                "error": "Request body must be a JSON object"
+            }, 400)
         
         if 'structured_info' not in data:
-            return jsonify({
+            return _ojson({
                 "error": "Missing required field: structured_info"
-            }), 400
+            }, 400)
         
+        # Accept the extraction either as a JSON object or as a JSON string
         structured_info = data['structured_info']
+        try:
+            if isinstance(structured_info, str):
+                medical_extraction = MedicalExtraction.model_validate_json(structured_info)
+            else:
+                medical_extraction = MedicalExtraction.model_validate(structured_info)
+        except ValidationError:
+            return _ojson({
+                "error": "Field structured_info is not a valid medical extraction"
+            }, 400)
         
-        logger.info(f"Processing diagnosis request")
-        
-        # Import the diagnosis function
-        from backend.medical_extraction_system import generate_diagnosis
+        logger.info("Processing diagnosis request")
         
         # Generate diagnosis
-        diagnosis = generate_diagnosis(structured_info)
+        diagnosis = generate_diagnosis(medical_extraction)
         
-        return jsonify({
+        return _ojson({
             "diagnosis": diagnosis,
             "timestamp": datetime.now(timezone.utc).isoformat()
-        }), 200
-        
-    except Exception as e:
-        logger.error(f"Error processing diagnosis request: {str(e)}")
-        return jsonify({
-            "error": "Internal server error",
-            "details": str(e)
-        }), 500
+        }, 200)
+        
+    except HTTPException:
+        raise
+    except Exception:
+        return _internal_error("Internal server error", "Error processing diagnosis request")
 
 @app.route('/api/sessions', methods=['GET'])
 def get_sessions():
     """Get information about active sessions."""
-    return jsonify({
-        "active_sessions": len(active_sessions),
-        "sessions": active_sessions
-    }), 200
+    sessions = session_store.all()
+    return _ojson({
+        "active_sessions": len(sessions),
+        "sessions": sessions
+    }, 200)
 
 @app.route('/api/sessions/<session_id>', methods=['DELETE'])
 def delete_session(session_id):
-    """Delete a specific session."""
-    if session_id in active_sessions:
-        del active_sessions[session_id]
-        return jsonify({
+    """Delete a specific session and its stored conversation history."""
+    found = session_store.delete(session_id)
+    
+    # The conversation checkpoints outlive the session entry (they are not
+    # bounded by SESSION_TTL_SECONDS), so remove them even if it has expired
+    config = {"configurable": {"thread_id": session_id}}
+    if checkpointer.get_tuple(config) is not None:
+        checkpointer.delete_thread(session_id)
+        found = True
+    
+    if found:
+        return _ojson({
             "message": f"Session {session_id} deleted successfully"
-        }), 200
+        }, 200)
     else:
-        return jsonify({
+        return _ojson({
             "error": f"Session {session_id} not found"
-        }), 404
+        }, 404)
 
 @app.route('/api/transcribe', methods=['POST'])
 def transcribe_audio():
@@ -249,77 +538,55 @@ def transcribe_audio():
     try:
         # Check if file is present in request
         if 'audio' not in request.files:
-            return jsonify({
+            return _ojson({
                 "error": "No audio file provided"
-            }), 400
+            }, 400)
         
         file = request.files['audio']
         
         # Check if file is selected
         if file.filename == '':
-            return jsonify({
+            return _ojson({
                 "error": "No audio file selected"
-            }), 400
+            }, 400)
         
         # Validate file extension
-        allowed_extensions = {'mp3', 'wav', 'm4a', 'ogg', 'flac'}
-        file_ext = file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else ''
-        
-        if file_ext not in allowed_extensions:
-            return jsonify({
-                "error": f"Invalid file type. Supported formats: {', '.join(allowed_extensions)}"
-            }), 400
-        
-        # Check file size (max 25MB)
-        max_size = 25 * 1024 * 1024  # 25MB
-        file.seek(0, os.SEEK_END)
-        file_size = file.tell()
-        file.seek(0)  # Reset file pointer
-        
-        if file_size > max_size:
-            return jsonify({
-                "error": "File too large. Maximum size is 25MB"
-            }), 400
-        
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{file_ext}') as temp_file:
-            file.save(temp_file.name)
-            temp_filename = temp_file.name
-        
-        try:
-            # Initialize OpenAI client
-            client = openai.OpenAI()
-            
-            # Transcribe audio using Whisper
-            with open(temp_filename, 'rb') as audio_file:
-                transcription = client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file
-                    # No language parameter - preserve original language without translation
-                )
-            
-            # Clean up temporary file
-            os.unlink(temp_filename)
-            
-            return jsonify({
-                "transcription": transcription.text,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "filename": secure_filename(file.filename)
-            }), 200
-            
-        except Exception as transcription_error:
-            # Clean up temporary file on error
-            if os.path.exists(temp_filename):
-                os.unlink(temp_filename)
-            raise transcription_error
-        
-    except Exception as e:
-        logger.error(f"Error transcribing audio: {str(e)}")
-        logger.error(traceback.format_exc())
-        return jsonify({
-            "error": "Failed to transcribe audio",
-            "details": str(e)
-        }), 500
+        file_ext = os.path.splitext(file.filename)[1].lower().lstrip('.')
+        
+        if file_ext not in ALLOWED_AUDIO_EXTENSIONS:
+            return _ojson({
+                "error": f"Invalid file type. Supported formats: {', '.join(sorted(ALLOWED_AUDIO_EXTENSIONS))}"
+            }, 400)
+        
+        # MAX_CONTENT_LENGTH leaves headroom for multipart overhead, so a file
+        # slightly over the Whisper limit can still get here. Use the part's
+        # Content-Length when the client sent one, otherwise measure the stream.
+        file_size = file.content_length
+        if not file_size:
+            file.stream.seek(0, os.SEEK_END)
+            file_size = file.stream.tell()
+            file.stream.seek(0)
+        
+        if file_size > MAX_AUDIO_SIZE:
+            return _audio_too_large()
+        
+        # Upload straight from the request stream, no temporary file needed
+        transcription = OPENAI_CLIENT.audio.transcriptions.create(
+            model="whisper-1",
+            file=(file.filename, file.stream, file.mimetype)
+            # No language parameter - preserve original language without translation
+        )
+        
+        return _ojson({
+            "transcription": transcription.text,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "filename": secure_filename(file.filename)
+        }, 200)
+        
+    except HTTPException:
+        raise
+    except Exception:
+        return _internal_error("Failed to transcribe audio", "Error transcribing audio")
 
 @app.route('/api/transcribe-url', methods=['POST'])
 def transcribe_audio_from_url():
@@ -334,17 +601,21 @@ def transcribe_audio_from_url():
     try:
         # Validate request
         if not request.is_json:
-            return jsonify({
+            return _ojson({
                 "error": "Content-Type must be application/json"
-            }), 400
+            }, 400)
         
-        data = request.get_json()
+        data = _parse_json()
+        if data is None:
+            return _ojson({
+                "error": "Request body must be a JSON object"
+            }, 400)
         audio_url = data.get('audio_url')
         
         if not audio_url:
-            return jsonify({
+            return _ojson({
                 "error": "No audio URL provided"
-            }), 400
+            }, 400)
         
         # Validate URL format
         try:
@@ -352,98 +623,90 @@ def transcribe_audio_from_url():
             if not parsed_url.scheme or not parsed_url.netloc:
                 raise ValueError("Invalid URL format")
         except Exception:
-            return jsonify({
+            return _ojson({
                 "error": "Invalid URL format"
-            }), 400
+            }, 400)
         
         # Validate file extension
-        allowed_extensions = {'mp3', 'wav', 'm4a', 'ogg', 'flac', 'aac'}
-        url_path = parsed_url.path.lower()
-        file_ext = None
+        file_ext = os.path.splitext(parsed_url.path)[1].lower().lstrip('.')
         
-        for ext in allowed_extensions:
-            if f'.{ext}' in url_path:
-                file_ext = ext
-                break
+        if file_ext not in ALLOWED_URL_AUDIO_EXTENSIONS:
+            return _ojson({
+                "error": f"Invalid file type. Supported formats: {', '.join(sorted(ALLOWED_URL_AUDIO_EXTENSIONS))}"
+            }, 400)
         
-        if not file_ext:
-            return jsonify({
-                "error": f"Invalid file type. Supported formats: {', '.join(allowed_extensions)}"
-            }), 400
+        # Probe the size first so oversized files are rejected before downloading.
+        # Servers that don't support HEAD are handled by the checks below.
+        try:
+            head = http_session.head(audio_url, timeout=5, allow_redirects=True)
+            size = _content_length(head.headers)
+            if head.ok and size is not None and size > MAX_AUDIO_SIZE:
+                return _audio_too_large()
+        except requests.exceptions.RequestException:
+            pass
         
         # Download audio file
         try:
-            logger.info(f"Downloading audio from URL: {audio_url}")
-            response = requests.get(audio_url, timeout=30, stream=True)
+            logger.info("Downloading audio from URL: %s", audio_url)
+            response = http_session.get(audio_url, timeout=30, stream=True)
             response.raise_for_status()
             
             # Check content length if available
-            content_length = response.headers.get('content-length')
-            if content_length:
-                max_size = 25 * 1024 * 1024  # 25MB
-                if int(content_length) > max_size:
-                    return jsonify({
-                        "error": "Audio file too large. Maximum size is 25MB"
-                    }), 400
+            size = _content_length(response.headers)
+            if size is not None and size > MAX_AUDIO_SIZE:
+                response.close()
+                return _audio_too_large()
             
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to download audio from URL: {str(e)}")
-            return jsonify({
-                "error": f"Failed to download audio file: {str(e)}"
-            }), 400
-        
-        # Create temporary file and save audio data
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{file_ext}') as temp_file:
+        except requests.exceptions.RequestException:
+            # The exception text names the target host and connection details,
+            # so it only goes to the log, referenced by the returned error id
+            error_id = uuid.uuid4().hex
+            logger.exception("Failed to download audio from URL (error_id=%s)", error_id)
+            return _ojson({
+                "error": "Failed to download audio file",
+                "error_id": error_id
+            }, 400)
+        
+        # Buffer the download in memory and upload it directly, enforcing the
+        # size limit while streaming since Content-Length may be absent or wrong
+        audio_buffer = io.BytesIO()
+        with response:
             for chunk in response.iter_content(chunk_size=8192):
-                temp_file.write(chunk)
-            temp_filename = temp_file.name
-        
-        try:
-            # Initialize OpenAI client
-            client = openai.OpenAI()
-            
-            # Transcribe audio using Whisper
-            with open(temp_filename, 'rb') as audio_file:
-                transcription = client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file
-                    # No language parameter - preserve original language without translation
-                )
-            
-            # Clean up temporary file
-            os.unlink(temp_filename)
-            
-            return jsonify({
-                "transcription": transcription.text,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "source_url": audio_url
-            }), 200
-            
-        except Exception as transcription_error:
-            # Clean up temporary file on error
-            if os.path.exists(temp_filename):
-                os.unlink(temp_filename)
-            raise transcription_error
-        
-    except Exception as e:
-        logger.error(f"Error transcribing audio from URL: {str(e)}")
-        logger.error(traceback.format_exc())
-        return jsonify({
-            "error": "Failed to transcribe audio from URL",
-            "details": str(e)
-        }), 500
+                if audio_buffer.tell() + len(chunk) > MAX_AUDIO_SIZE:
+                    return _audio_too_large()
+                audio_buffer.write(chunk)
+        audio_buffer.seek(0)
+        
+        transcription = OPENAI_CLIENT.audio.transcriptions.create(
+            model="whisper-1",
+            file=(f"audio.{file_ext}", audio_buffer)
+            # No language parameter - preserve original language without translation
+        )
+        
+        return _ojson({
+            "transcription": transcription.text,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "source_url": audio_url
+        }, 200)
+        
+    except HTTPException:
+        raise
+    except Exception:
+        return _internal_error("Failed to transcribe audio from URL", "Error transcribing audio from URL")
 
 @app.route('/api/status', methods=['GET'])
 def get_status():
     """Get system status and information."""
-    return jsonify({
+    return _ojson({
         "status": "running",
         "model": "gpt-4o-mini",
-        "active_sessions": len(active_sessions),
+        "active_sessions": session_store.count(),
         "endpoints": [
             "/health",
             "/api/chat",
+            "/api/chat/batch",
             "/api/extract", 
+            "/api/extract/batch",
             "/api/diagnose",
             "/api/transcribe",
             "/api/transcribe-url",
@@ -451,27 +714,35 @@ def get_status():
             "/api/status"
         ],
         "timestamp": datetime.now(timezone.utc).isoformat()
-    }), 200
+    }, 200)
 
 @app.errorhandler(404)
 def not_found(error):
-    return jsonify({
+    return _ojson({
         "error": "Endpoint not found",
         "available_endpoints": [
             "/health",
             "/api/chat",
+            "/api/chat/batch",
             "/api/extract",
+            "/api/extract/batch",
             "/api/diagnose", 
             "/api/sessions",
             "/api/status"
         ]
-    }), 404
+    }, 404)
+
+@app.errorhandler(413)
+def request_too_large(error):
+    return _ojson({
+        "error": "Request body too large"
+    }, 413)
 
 @app.errorhandler(500)
 def internal_error(error):
-    return jsonify({
+    return _ojson({
         "error": "Internal server error"
-    }), 500
+    }, 500)
 
 if __name__ == '__main__':
     # Check if OpenAI API key is set
@@ -482,9 +753,12 @@ if __name__ == '__main__':
     logger.info("Available endpoints:")
     logger.info("  GET  /health - Health check")
     logger.info("  POST /api/chat - Main chat interface")
+    logger.info("  POST /api/chat/batch - Batch chat interface")
     logger.info("  POST /api/extract - Extract medical information")
+    logger.info("  POST /api/extract/batch - Batch extract medical information")
     logger.info("  POST /api/diagnose - Generate diagnosis")
     logger.info("  GET  /api/sessions - Get active sessions")
     logger.info("  GET  /api/status - Get system status")
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Development server only; use gunicorn with wsgi.py in production
+    app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
\ No newline at end of file
@@ -0,0 +1,20 @@
+"""Gunicorn settings for the Medical Information Extraction API.
+
+Usage (from the backend directory):
+    gunicorn -c gunicorn.conf.py wsgi:application
+"""
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+
+# Conversation checkpoints are stored in SQLite and can be shared by several
+# workers on one host; set REDIS_URL as well so the session list is shared
+# before raising GUNICORN_WORKERS. Most concurrency comes from threads:
+# requests spend almost all their time waiting on OpenAI, so a large pool
+# lets many of them overlap.
+workers = int(os.getenv("GUNICORN_WORKERS", "1"))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "256"))
+
+# LLM-backed requests can take well over gunicorn's 30s default
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "300"))
@@ -1,12 +1,19 @@
 from langchain_openai import ChatOpenAI
+from langchain_core.prompts import ChatPromptTemplate
 from langgraph_supervisor import create_supervisor, create_handoff_tool
 from langgraph.prebuilt import create_react_agent
-from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
 from langgraph.store.memory import InMemoryStore
 from pydantic import BaseModel, Field
 from typing import List, Optional
-import json
+from cachetools import LRUCache
+import hashlib
+import httpx
+import openai
+import os
 import pprint
+import sqlite3
+import threading
 
 # Pydantic models for structured outputs
 class PatientIdentification(BaseModel):
@@ -27,61 +34,170 @@ class DiagnosisResponse(BaseModel):
     treatment_plan: str = Field(description="Recommended treatment plan")
     recommendations: str = Field(description="Additional medical recommendations")
 
+# Connection pool sized so that concurrent server threads translate into
+# concurrent upstream OpenAI calls instead of queueing on a handful of sockets
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "1024"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "256"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+
+def build_openai_http_client():
+    """Pooled HTTP client for OpenAI SDK clients.
+
+    DefaultHttpxClient keeps the SDK's transport defaults (redirects, timeouts).
+    httpx.Limits is only valid while the SDK's transport is httpx, which is why
+    openai and httpx are pinned together in requirements.txt.
+    """
+    return openai.DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS
+        )
+    )
+
 # Initialize the GPT-4o-mini model
-model = ChatOpenAI(model="gpt-4o-mini", temperature=0.3)
+model = ChatOpenAI(
+    model="gpt-4o-mini",
+    temperature=0.3,
+    max_retries=OPENAI_MAX_RETRIES,
+    http_client=build_openai_http_client()
+)
+
+# Structured output runnables are built once instead of on every call
+EXTRACTION_RUNNABLE = model.with_structured_output(MedicalExtraction)
+DIAGNOSIS_RUNNABLE = model.with_structured_output(DiagnosisResponse)
+
+# Static instructions go first, in the system message, so every request shares
+# the same prompt prefix. They are currently well under OpenAI's 1024-token
+# prompt caching threshold, but caching can apply if they grow past it.
+EXTRACTION_INSTRUCTIONS = """Analyze the following medical text and extract structured information.
+
+Extract:
+1. All symptoms mentioned by the patient
+2. Patient identification details (name, age, ID, gender, phone, address if mentioned)
+3. Brief reason for the medical consultation
+
+IMPORTANT: 
+- Always include all patient_info fields even if not mentioned in the text
+- Use "Not provided" for missing patient information except for gender
+- For age, use null if not provided (not a string)
+- For gender: If not explicitly mentioned, infer it from the patient's name (e.g., "John" -> "Male", "Maria" -> "Female"). Only use "Not provided" if the name is ambiguous or not given"""
+
+DIAGNOSIS_INSTRUCTIONS = """Based on the following structured medical information, provide a medical diagnosis, treatment plan, and recommendations.
+
+Provide a professional medical assessment based on this information.
+Note: This is for educational purposes only and should not replace professional medical advice."""
+
+EXTRACTION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", EXTRACTION_INSTRUCTIONS),
+    ("user", "Text: {text}")
+])
+
+DIAGNOSIS_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", DIAGNOSIS_INSTRUCTIONS),
+    ("user", """Symptoms: {symptoms}
+Patient Age: {age}
+Patient Gender: {gender}
+Reason for consultation: {reason_for_consultation}""")
+])
+
+EXTRACTION_CHAIN = EXTRACTION_PROMPT | EXTRACTION_RUNNABLE
+DIAGNOSIS_CHAIN = DIAGNOSIS_PROMPT | DIAGNOSIS_RUNNABLE
+
+# Extraction and diagnosis are deterministic enough per input that repeated
+# requests are served from an in-process LRU keyed by a hash of the input.
+# Entries are stored as JSON so callers never share a mutable model instance.
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "10000"))
+EXTRACTION_CACHE = LRUCache(maxsize=LLM_CACHE_SIZE)
+DIAGNOSIS_CACHE = LRUCache(maxsize=LLM_CACHE_SIZE)
+_cache_lock = threading.RLock()
+
+def _cache_key(data: str) -> str:
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+def _cache_get(cache: LRUCache, key: str) -> Optional[str]:
+    with _cache_lock:
+        return cache.get(key)
+
+def _cache_set(cache: LRUCache, key: str, value: BaseModel):
+    with _cache_lock:
+        cache[key] = value.model_dump_json()
+
+def _extraction_error(e: Exception) -> MedicalExtraction:
+    """Default extraction structure returned when the model call fails."""
+    return MedicalExtraction(
+        symptoms=[f"Error extracting symptoms: {str(e)}"],
+        # Every field is required (no defaults), so pass them explicitly
+        patient_info=PatientIdentification(
+            name=None,
+            age=None,
+            identification_number=None,
+            gender=None,
+            phone=None,
+            address=None
+        ),
+        reason_for_consultation=f"Error: {str(e)}"
+    )
 
 def extract_medical_information(text: str) -> MedicalExtraction:
     """Extract medical information from free text input using structured output."""
+    key = _cache_key(text)
+    cached = _cache_get(EXTRACTION_CACHE, key)
+    if cached is not None:
+        return MedicalExtraction.model_validate_json(cached)
+    
     try:
-        # Use the model with structured output
-        structured_model = model.with_structured_output(MedicalExtraction)
-        
-        extraction_prompt = f"""
-        Analyze the following medical text and extract structured information.
-        
-        Text: {text}
-        
-        Extract:
-        1. All symptoms mentioned by the patient
-        2. Patient identification details (name, age, ID, gender, phone, address if mentioned)
-        3. Brief reason for the medical consultation
-        
-        IMPORTANT: 
-        - Always include all patient_info fields even if not mentioned in the text
-        - Use "Not provided" for missing patient information except for gender
-        - For age, use null if not provided (not a string)
-        - For gender: If not explicitly mentioned, infer it from the patient's name (e.g., "John" -> "Male", "Maria" -> "Female"). Only use "Not provided" if the name is ambiguous or not given
-        """
-        
-        result = structured_model.invoke(extraction_prompt)
+        result = EXTRACTION_CHAIN.invoke({"text": text})
+        _cache_set(EXTRACTION_CACHE, key, result)
         return result
     except Exception as e:
         # Return a default structure in case of error
-        return MedicalExtraction(
-            symptoms=[f"Error extracting symptoms: {str(e)}"],
-            patient_info=PatientIdentification(),
-            reason_for_consultation=f"Error: {str(e)}"
+        return _extraction_error(e)
+
+def extract_medical_information_batch(texts: List[str], max_concurrency: int = 8) -> List[MedicalExtraction]:
+    """Extract medical information from several texts in a single batched model call."""
+    keys = [_cache_key(text) for text in texts]
+    results = [None] * len(texts)
+    
+    # Only texts missing from the cache go to the model
+    misses = []
+    for i, key in enumerate(keys):
+        cached = _cache_get(EXTRACTION_CACHE, key)
+        if cached is not None:
+            results[i] = MedicalExtraction.model_validate_json(cached)
+        else:
+            misses.append(i)
+    
+    if misses:
+        batch_results = EXTRACTION_CHAIN.batch(
+            [{"text": texts[i]} for i in misses],
+            config={"max_concurrency": max_concurrency},
+            return_exceptions=True
         )
+        for i, result in zip(misses, batch_results):
+            if isinstance(result, Exception):
+                # Failed items get the same default structure as the single-text path
+                results[i] = _extraction_error(result)
+            else:
+                _cache_set(EXTRACTION_CACHE, keys[i], result)
+                results[i] = result
+    
+    return results
 
 def generate_diagnosis(medical_extraction: MedicalExtraction) -> DiagnosisResponse:
     """Generate diagnosis, treatment plan, and recommendations based on structured medical information."""
     try:
-        # Use the model with structured output
-        structured_model = model.with_structured_output(DiagnosisResponse)
-        
-        diagnosis_prompt = f"""
-        Based on the following structured medical information, provide a medical diagnosis, treatment plan, and recommendations.
-        
-        Symptoms: {', '.join(medical_extraction.symptoms)}
-        Patient Age: {medical_extraction.patient_info.age or 'Not provided'}
-        Patient Gender: {medical_extraction.patient_info.gender or 'Not provided'}
-        Reason for consultation: {medical_extraction.reason_for_consultation}
-        
-        Provide a professional medical assessment based on this information.
-        Note: This is for educational purposes only and should not replace professional medical advice.
-        """
+        key = _cache_key(medical_extraction.model_dump_json())
+        cached = _cache_get(DIAGNOSIS_CACHE, key)
+        if cached is not None:
+            return DiagnosisResponse.model_validate_json(cached)
         
-        result = structured_model.invoke(diagnosis_prompt)
+        result = DIAGNOSIS_CHAIN.invoke({
+            "symptoms": ', '.join(medical_extraction.symptoms),
+            "age": medical_extraction.patient_info.age or 'Not provided',
+            "gender": medical_extraction.patient_info.gender or 'Not provided',
+            "reason_for_consultation": medical_extraction.reason_for_consultation
+        })
+        _cache_set(DIAGNOSIS_CACHE, key, result)
         return result
     except Exception as e:
         # Return a default structure in case of error
@@ -94,8 +210,8 @@ def generate_diagnosis(medical_extraction: MedicalExtraction) -> DiagnosisRespon
 def validate_medical_extraction(extraction: MedicalExtraction) -> str:
     """Validate and format extracted medical information."""
     try:
-        # Convert to dictionary for JSON serialization
-        return json.dumps(extraction.model_dump(), indent=2)
+        # Serialize in a single pass with pydantic-core
+        return extraction.model_dump_json(indent=2)
     except Exception as e:
         return f"Validation error: {str(e)}"
 
@@ -171,8 +287,12 @@ offtopic_agent = create_react_agent(
     politely redirect them to medical-related queries. Use the handle_offtopic_query tool for all requests."""
 )
 
-# Create supervisor workflow with memory
-checkpointer = InMemorySaver()
+# Create supervisor workflow with memory. Conversation checkpoints are kept
+# in SQLite so they survive restarts and are shared by every server worker.
+# They are not expired with the session TTL; the API removes a thread's
+# checkpoints when its session is deleted.
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", "checkpoints.sqlite")
+checkpointer = SqliteSaver(sqlite3.connect(CHECKPOINT_DB, check_same_thread=False))
 store = InMemoryStore()
 
 workflow = create_supervisor(
@@ -0,0 +1,96 @@
+"""Session activity tracking for the Flask API.
+
+Sessions expire after SESSION_TTL_SECONDS of inactivity. When REDIS_URL is
+set they are kept in Redis so every gunicorn worker sees the same data;
+otherwise they live in process memory.
+"""
+from collections import OrderedDict
+import os
+import threading
+import time
+import orjson
+import redis
+
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "64"))
+
+class InMemorySessionStore:
+    """Process-local session store with TTL eviction."""
+
+    def __init__(self, ttl: int):
+        self._ttl = ttl
+        self._sessions = OrderedDict()  # session_id -> (expires_at, info), oldest first
+        self._lock = threading.Lock()
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        while self._sessions:
+            session_id, (expires_at, _) = next(iter(self._sessions.items()))
+            if expires_at > now:
+                break
+            del self._sessions[session_id]
+
+    def set(self, session_id: str, info: dict):
+        with self._lock:
+            self._sessions[session_id] = (time.monotonic() + self._ttl, info)
+            self._sessions.move_to_end(session_id)
+            self._evict_expired()
+
+    def all(self) -> dict:
+        with self._lock:
+            self._evict_expired()
+            return {session_id: info for session_id, (_, info) in self._sessions.items()}
+
+    def count(self) -> int:
+        with self._lock:
+            self._evict_expired()
+            return len(self._sessions)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            self._evict_expired()
+            return self._sessions.pop(session_id, None) is not None
+
+class RedisSessionStore:
+    """Redis-backed session store shared across worker processes."""
+
+    KEY_PREFIX = "sess:"
+
+    def __init__(self, url: str, ttl: int):
+        self._ttl = ttl
+        self._redis = redis.Redis(
+            connection_pool=redis.BlockingConnectionPool.from_url(url, max_connections=REDIS_MAX_CONNECTIONS)
+        )
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.KEY_PREFIX}{session_id}"
+
+    def _keys(self) -> list:
+        return list(self._redis.scan_iter(match=f"{self.KEY_PREFIX}*", count=500))
+
+    def set(self, session_id: str, info: dict):
+        self._redis.set(self._key(session_id), orjson.dumps(info), ex=self._ttl)
+
+    def all(self) -> dict:
+        keys = self._keys()
+        if not keys:
+            return {}
+        sessions = {}
+        for key, value in zip(keys, self._redis.mget(keys)):
+            # Keys can expire between SCAN and MGET
+            if value is not None:
+                sessions[key.decode()[len(self.KEY_PREFIX):]] = orjson.loads(value)
+        return sessions
+
+    def count(self) -> int:
+        return len(self._keys())
+
+    def delete(self, session_id: str) -> bool:
+        return self._redis.delete(self._key(session_id)) > 0
+
+def create_session_store():
+    """Create the session store configured by the environment."""
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        return RedisSessionStore(redis_url, SESSION_TTL_SECONDS)
+    return InMemorySessionStore(SESSION_TTL_SECONDS)
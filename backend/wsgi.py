@@ -0,0 +1,4 @@
+"""WSGI entrypoint for running the API under a production server (e.g. gunicorn)."""
+from flask_backend import app
+
+application = app